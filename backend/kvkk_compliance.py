@@ -16,20 +16,20 @@ import json
 
 # ============== KVKK Hak Talepleri ==============
 
-VALID_REQUEST_TYPES = [
+VALID_REQUEST_TYPES = frozenset({
     "access",         # Erişim hakkı (Madde 11/1-a,b,c)
     "rectification",  # Düzeltme hakkı (Madde 11/1-d)
     "erasure",        # Silme/yok etme hakkı (Madde 11/1-e)
     "portability",    # Veri taşıma hakkı (Madde 11/1-ç)
     "objection",      # İtiraz hakkı (Madde 11/1-f,g)
-]
+})
 
-VALID_REQUEST_STATUSES = [
+VALID_REQUEST_STATUSES = frozenset({
     "pending",      # Beklemede
     "in_progress",  # İşleniyor
     "completed",    # Tamamlandı
     "rejected",     # Reddedildi
-]
+})
 
 
 async def create_rights_request(
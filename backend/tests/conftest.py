@@ -0,0 +1,43 @@
+"""
+Quick ID Reader - Ortak pytest fixture'ları
+"""
+import os
+import sys
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# ============== Model Fixtures ==============
+
+@pytest.fixture(scope="module")
+def sample_guest_create():
+    """Geçerli misafir modeli - modül başına bir kez doğrulanır"""
+    from server import GuestCreate
+    return GuestCreate(
+        first_name="Ali",
+        last_name="Yılmaz",
+        id_number="12345678901",
+        kvkk_consent=True
+    )
+
+
+# ============== Auth Fixtures ==============
+
+@pytest.fixture(autouse=True, scope="session")
+def _fast_hasher():
+    """QUICKID_FAST_HASH=1 iken bcrypt yerine tek turlu pbkdf2 kullan.
+
+    Sadece hash/verify sözleşmesini test eder; CI her iki modu da çalıştırabilir.
+    """
+    if os.environ.get("QUICKID_FAST_HASH") != "1":
+        yield
+        return
+    import auth
+    from passlib.context import CryptContext
+    original = auth.pwd_context
+    auth.pwd_context = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=1)
+    yield
+    auth.pwd_context = original
@@ -9,6 +9,7 @@ import asyncio
 import httpx
 import os
 import sys
+import uuid
 
 # Backend URL
 BASE_URL = "http://localhost:8001"
@@ -51,6 +52,30 @@ def auth_headers(token):
     return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
 
+@pytest.fixture
+def guest_factory(admin_token):
+    """Geçici misafir oluşturucu - test sonunda kalıcı olarak silinir"""
+    created = []
+    client = httpx.Client(base_url=BASE_URL, headers=auth_headers(admin_token))
+
+    def make(first_name, last_name, id_number):
+        res = client.post("/api/guests", json={
+            "first_name": first_name,
+            "last_name": last_name,
+            "id_number": id_number,
+            "force_create": True
+        })
+        assert res.status_code == 200
+        guest_id = res.json()["guest"]["id"]
+        created.append(guest_id)
+        return guest_id
+
+    yield make
+    for guest_id in created:
+        client.delete(f"/api/guests/{guest_id}?permanent=true")
+    client.close()
+
+
 # ============== Health & Public Tests ==============
 
 class TestHealth:
@@ -260,6 +285,59 @@ class TestGuestAPI:
             assert res.status_code == 400
 
 
+class TestGuestLifecycleAPI:
+    """Misafir soft delete / geri yükleme / kalıcı silme testleri"""
+
+    def test_soft_delete(self, admin_token, guest_factory):
+        last_name = f"SoftDel{uuid.uuid4().hex[:8]}"
+        guest_id = guest_factory("Test", last_name, "99988877766")
+        with httpx.Client(base_url=BASE_URL) as client:
+            res = client.delete(f"/api/guests/{guest_id}", headers=auth_headers(admin_token))
+            assert res.status_code == 200
+            assert res.json()["action"] == "soft_deleted"
+
+            # Hidden in normal search
+            res = client.get(f"/api/guests?search={last_name}", headers=auth_headers(admin_token))
+            assert res.status_code == 200
+            assert res.json()["total"] == 0
+
+            # Visible with include_deleted=true
+            res = client.get(f"/api/guests?search={last_name}&include_deleted=true",
+                           headers=auth_headers(admin_token))
+            assert res.status_code == 200
+            data = res.json()
+            assert data["total"] == 1
+            assert data["guests"][0]["status"] == "deleted"
+
+    def test_restore_guest(self, admin_token, guest_factory):
+        last_name = f"Restore{uuid.uuid4().hex[:8]}"
+        guest_id = guest_factory("Test", last_name, "11122233344")
+        with httpx.Client(base_url=BASE_URL) as client:
+            res = client.delete(f"/api/guests/{guest_id}", headers=auth_headers(admin_token))
+            assert res.status_code == 200
+
+            res = client.post(f"/api/guests/{guest_id}/restore", headers=auth_headers(admin_token))
+            assert res.status_code == 200
+            assert res.json()["guest"]["status"] == "pending"
+
+            res = client.get(f"/api/guests?search={last_name}", headers=auth_headers(admin_token))
+            assert res.status_code == 200
+            assert res.json()["total"] >= 1
+
+    def test_permanent_delete(self, admin_token, guest_factory):
+        last_name = f"PermDel{uuid.uuid4().hex[:8]}"
+        guest_id = guest_factory("Test", last_name, "55566677788")
+        with httpx.Client(base_url=BASE_URL) as client:
+            res = client.delete(f"/api/guests/{guest_id}?permanent=true", headers=auth_headers(admin_token))
+            assert res.status_code == 200
+            assert res.json()["action"] == "permanently_deleted"
+
+            res = client.get(f"/api/guests?search={last_name}&include_deleted=true",
+                           headers=auth_headers(admin_token))
+            assert res.status_code == 200
+            assert res.json()["total"] == 0
+
+
 # ============== KVKK Settings Tests ==============
 
 class TestKvkkSettingsAPI:
@@ -4,17 +4,23 @@ pytest birim ve entegrasyon testleri
 Hedef: %80+ coverage
 
 Kullanım: cd /app/backend && python -m pytest tests/ -v
+Paralel: cd /app/backend && python -m pytest tests/test_unit.py -n auto -v
 """
 import pytest
 import asyncio
 import os
 import sys
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone, timedelta
+from typing import Optional
 from unittest.mock import AsyncMock, patch, MagicMock
 
 # Add backend to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Sabit zaman damgası - serialization testleri saatten bağımsız olsun
+FIXED_DT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
 
 # ============== Auth Tests ==============
 
@@ -73,66 +79,67 @@ class TestKvkkSettings:
 
 # ============== Confidence Scoring Tests ==============
 
+@dataclass(frozen=True)
+class DocFixture:
+    """Puanlama testleri için değiştirilemez belge girdisi"""
+    is_valid: bool = True
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    id_number: Optional[str] = None
+    birth_date: Optional[str] = None
+    document_type: Optional[str] = None
+    nationality: Optional[str] = None
+    gender: Optional[str] = None
+    expiry_date: Optional[str] = None
+    document_number: Optional[str] = None
+    birth_place: Optional[str] = None
+    warnings: tuple = ()
+
+
+HIGH_CONF_DOC = DocFixture(
+    first_name="Ali", last_name="Yılmaz", id_number="12345678901",
+    birth_date="1990-01-01", document_type="tc_kimlik", nationality="TC", gender="M",
+    expiry_date="2030-01-01", document_number="A12345", birth_place="İstanbul",
+)
+MEDIUM_CONF_DOC = DocFixture(
+    first_name="Ali", last_name="Yılmaz", id_number="12345678901",
+    document_type="tc_kimlik", warnings=("Bazı alanlar okunamadı",),
+)
+INVALID_DOC = DocFixture(
+    is_valid=False, document_type="other",
+    warnings=("Belge tanınamadı", "Görüntü çok bulanık", "Metin okunamadı"),
+)
+PARTIAL_DOC = DocFixture(
+    first_name="Ali", last_name="Yılmaz", id_number="12345678901",
+    birth_date="1990-01-01", document_type="tc_kimlik", nationality="TC",
+)
+UNREADABLE_DOC = DocFixture(is_valid=False, warnings=("Okunamadı",))
+
+
+def as_doc(doc: DocFixture) -> dict:
+    """Belgeyi puanlayıcı girdisine çevir - None alanlar eksik anahtar olarak kalır"""
+    return {k: v for k, v in asdict(doc).items() if v is not None}
+
+
 class TestConfidenceScoring:
     """AI tarama güvenilirlik puanlama testleri"""
 
     def test_high_confidence_score(self):
         from kvkk_compliance import calculate_confidence_score
-        data = {
-            "documents": [{
-                "is_valid": True,
-                "first_name": "Ali",
-                "last_name": "Yılmaz",
-                "id_number": "12345678901",
-                "birth_date": "1990-01-01",
-                "document_type": "tc_kimlik",
-                "nationality": "TC",
-                "gender": "M",
-                "expiry_date": "2030-01-01",
-                "document_number": "A12345",
-                "birth_place": "İstanbul",
-                "warnings": []
-            }]
-        }
-        result = calculate_confidence_score(data)
+        result = calculate_confidence_score({"documents": [as_doc(HIGH_CONF_DOC)]})
         assert result["overall_score"] >= 85
         assert result["confidence_level"] == "high"
         assert result["review_needed"] is False
 
     def test_medium_confidence_score(self):
         from kvkk_compliance import calculate_confidence_score
-        data = {
-            "documents": [{
-                "is_valid": True,
-                "first_name": "Ali",
-                "last_name": "Yılmaz",
-                "id_number": "12345678901",
-                "birth_date": None,
-                "document_type": "tc_kimlik",
-                "nationality": None,
-                "gender": None,
-                "warnings": ["Bazı alanlar okunamadı"]
-            }]
-        }
-        result = calculate_confidence_score(data)
+        result = calculate_confidence_score({"documents": [as_doc(MEDIUM_CONF_DOC)]})
         assert 50 <= result["overall_score"] < 85
         assert result["confidence_level"] in ("medium", "low")
 
     def test_low_confidence_invalid_doc(self):
         from kvkk_compliance import calculate_confidence_score
-        data = {
-            "documents": [{
-                "is_valid": False,
-                "first_name": None,
-                "last_name": None,
-                "id_number": None,
-                "birth_date": None,
-                "document_type": "other",
-                "nationality": None,
-                "warnings": ["Belge tanınamadı", "Görüntü çok bulanık", "Metin okunamadı"]
-            }]
-        }
-        result = calculate_confidence_score(data)
+        result = calculate_confidence_score({"documents": [as_doc(INVALID_DOC)]})
         assert result["overall_score"] < 70
         assert result["confidence_level"] == "low"
         assert result["review_needed"] is True
@@ -145,29 +152,11 @@ class TestConfidenceScoring:
 
     def test_multiple_documents(self):
         from kvkk_compliance import calculate_confidence_score
-        data = {
-            "documents": [
-                {
-                    "is_valid": True,
-                    "first_name": "Ali",
-                    "last_name": "Yılmaz",
-                    "id_number": "12345678901",
-                    "birth_date": "1990-01-01",
-                    "document_type": "tc_kimlik",
-                    "nationality": "TC",
-                    "warnings": []
-                },
-                {
-                    "is_valid": False,
-                    "first_name": None,
-                    "last_name": None,
-                    "id_number": None,
-                    "warnings": ["Okunamadı"]
-                }
-            ]
-        }
+        data = {"documents": [as_doc(PARTIAL_DOC), as_doc(UNREADABLE_DOC)]}
         result = calculate_confidence_score(data)
         assert len(result["document_scores"]) == 2
+        # Missing document_type falls back to the scorer default
+        assert result["document_scores"][1]["document_type"] == "unknown"
         # Average should be somewhere in between
         assert 20 < result["overall_score"] < 90
 
@@ -204,14 +193,8 @@ class TestDataModels:
         req = ScanRequest(image_base64="dGVzdA==")
         assert req.image_base64 == "dGVzdA=="
 
-    def test_guest_create_model(self):
-        from server import GuestCreate
-        guest = GuestCreate(
-            first_name="Ali",
-            last_name="Yılmaz",
-            id_number="12345678901",
-            kvkk_consent=True
-        )
+    def test_guest_create_model(self, sample_guest_create):
+        guest = sample_guest_create
         assert guest.first_name == "Ali"
         assert guest.kvkk_consent is True
         assert guest.force_create is False
@@ -276,10 +259,10 @@ class TestSerialization:
 
     def test_serialize_doc_with_datetime(self):
         from server import serialize_doc
-        now = datetime.now(timezone.utc)
-        doc = {"_id": "test", "created_at": now}
+        doc = {"_id": "test", "created_at": FIXED_DT}
         result = serialize_doc(doc)
         assert isinstance(result["created_at"], str)
+        assert result["created_at"] == "2024-01-01T00:00:00+00:00"
 
     def test_serialize_doc_none(self):
         from server import serialize_doc
@@ -304,29 +287,21 @@ class TestSerialization:
 class TestFieldDiffs:
     """Alan değişiklik karşılaştırma testleri"""
 
-    def test_compute_diffs_with_changes(self):
-        from server import compute_field_diffs
-        old = {"first_name": "Ali", "last_name": "Yılmaz"}
-        new = {"first_name": "Veli", "last_name": "Yılmaz"}
-        diffs = compute_field_diffs(old, new)
-        assert "first_name" in diffs
-        assert diffs["first_name"]["old"] == "Ali"
-        assert diffs["first_name"]["new"] == "Veli"
-
-    def test_compute_diffs_no_changes(self):
-        from server import compute_field_diffs
-        data = {"first_name": "Ali", "last_name": "Yılmaz"}
-        diffs = compute_field_diffs(data, data)
-        assert len(diffs) == 0
-
-    def test_compute_diffs_none_values(self):
+    @pytest.mark.parametrize("old,new,n_diffs,changed", [
+        ({"first_name": "Ali", "last_name": "Yılmaz"}, {"first_name": "Veli", "last_name": "Yılmaz"}, 1, ("Ali", "Veli")),
+        ({"first_name": "Ali", "last_name": "Yılmaz"}, {"first_name": "Ali", "last_name": "Yılmaz"}, 0, None),
+        # None values are ignored
+        ({"first_name": "Ali"}, {"first_name": None}, 0, None),
+    ], ids=["changed", "identical", "none_ignored"])
+    def test_compute_field_diffs(self, old, new, n_diffs, changed):
         from server import compute_field_diffs
-        old = {"first_name": "Ali"}
-        new = {"first_name": None}
         diffs = compute_field_diffs(old, new)
-        # None values are ignored
-        assert len(diffs) == 0
+        assert len(diffs) == n_diffs
+        if changed is not None:
+            assert diffs["first_name"]["old"] == changed[0]
+            assert diffs["first_name"]["new"] == changed[1]
 
 
 if __name__ == "__main__":
-    pytest.main([__file__, "-v", "--tb=short"])
+    pytest.main([__file__, "-v", "--tb=short", "-x",
+                 "-p", "no:cacheprovider", "--no-header"])
@@ -13,22 +13,35 @@ P1 FEATURES TO TEST:
 4. Rate Limiting on new endpoints (check-duplicate, update, delete)
 5. Background Scheduler - Check backend logs for startup message
 """
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
 import json
-import time
 import uuid
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
 
 # Configuration
 BASE_URL = "https://improve-guide.preview.emergentagent.com"
 ADMIN_EMAIL = "admin@quickid.com"
 ADMIN_PASSWORD = "admin123"
 
+# Rate-limit probe batch sizes - stop at the first batch that returns 429
+PROBE_BATCHES = (8, 16, 32, 16)
+# Max concurrent in-flight requests per burst
+MAX_IN_FLIGHT = 16
+
 class P1BackendTester:
     def __init__(self):
         self.base_url = BASE_URL
         self.token = None
+        self._auth_headers = {}  # Built once after login
         self.session = requests.Session()
+        # Pool sized to the 16-worker setup/cleanup fan-outs
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.test_guest_ids = []  # Track created guests for cleanup
         
     def login(self) -> bool:
@@ -43,10 +56,11 @@ class P1BackendTester:
             if response.status_code == 200:
                 data = response.json()
                 self.token = data.get("token")
-                self.session.headers.update({
+                self._auth_headers = {
                     "Authorization": f"Bearer {self.token}",
                     "Content-Type": "application/json"
-                })
+                }
+                self.session.headers.update(self._auth_headers)
                 return True
             else:
                 print(f"❌ Login failed: {response.status_code} {response.text}")
@@ -259,127 +273,105 @@ class P1BackendTester:
         except Exception as e:
             return (False, f"Permanent delete test error: {str(e)}")
 
+    def _burst_session(self) -> aiohttp.ClientSession:
+        """Authenticated aiohttp session shared by all rate-limit bursts"""
+        connector = aiohttp.TCPConnector(limit=64, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=5)
+        return aiohttp.ClientSession(headers=self._auth_headers, connector=connector, timeout=timeout)
+
+    async def _burst(self, session: aiohttp.ClientSession, method: str, urls: list, payloads: Optional[list] = None) -> list:
+        """Fire one request per URL concurrently and return the status codes in URL order"""
+        payloads = payloads or [None] * len(urls)
+        semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+
+        async def bounded(url, payload):
+            # Only the status line matters - release without reading the body
+            async with semaphore, session.request(method, url, json=payload) as response:
+                return response.status
+
+        return await asyncio.gather(*[
+            bounded(url, payload)
+            for url, payload in zip(urls, payloads)
+        ])
+
+    async def _probe(self, session: aiohttp.ClientSession, method: str, urls: list, payloads: Optional[list] = None) -> tuple:
+        """Send growing concurrent batches until a 429 appears; return (rate_hit, requests_sent)"""
+        payloads = payloads or [None] * len(urls)
+        sent = 0
+        for size in PROBE_BATCHES:
+            if sent >= len(urls):
+                break
+            statuses = await self._burst(session, method, urls[sent:sent + size], payloads[sent:sent + size])
+            sent += len(statuses)
+            if 429 in statuses:
+                return (True, sent)
+        return (False, sent)
+
     def test_rate_limiting_expansion(self) -> list:
         """Test P1: Rate limiting on new endpoints"""
         print("\n⏱️  Testing P1: Rate Limiting Expansion")
         
-        results = []
+        # Setup: one guest to update (60/minute) and 32 guests to delete (30/minute)
+        print("\n  Setup: Creating test guests for update/delete rate limit tests...")
+        # Update guest first and on its own - the delete fan-out may exhaust the 30/minute create quota
+        test_guest_id = self.create_test_guest("RateLimit", "Test", "99999999999")
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            # Extras are removed by cleanup
+            created = executor.map(
+                lambda i: self.create_test_guest("DelTest", f"User{i}", f"88800{i:05d}"),
+                range(35)
+            )
+            test_guests = [guest_id for guest_id in created if guest_id][:32]  # Enough for testing
         
-        # Test 1: GET /api/guests/check-duplicate (should have 60/minute limit)
-        print("\n  Test 1: Rate limiting on check-duplicate endpoint...")
-        try:
-            rate_session = requests.Session()
-            rate_session.headers.update({
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json"
-            })
-            
-            rate_hit = False
-            for i in range(65):  # Try 65 requests (limit should be 60/minute)
-                response = rate_session.get(
-                    f"{self.base_url}/api/guests/check-duplicate?id_number=test{i}",
-                    timeout=5
-                )
-                
-                if response.status_code == 429:
-                    print(f"    ✅ Rate limit hit on check-duplicate at request {i+1}")
-                    rate_hit = True
-                    break
-                elif i % 20 == 0:
-                    print(f"    Request {i+1}: {response.status_code}")
-                    
-                time.sleep(0.01)  # Small delay
-            
-            if rate_hit:
-                results.append(("Check-duplicate rate limiting", True, "Rate limit working"))
-            else:
-                results.append(("Check-duplicate rate limiting", False, "Rate limit not triggered after 65 requests"))
-                
-        except Exception as e:
-            results.append(("Check-duplicate rate limiting", False, f"Test error: {str(e)}"))
-
-        # Test 2: PATCH /api/guests/{id} (should have 60/minute limit)
-        print("\n  Test 2: Rate limiting on guest update endpoint...")
-        try:
-            # Create a guest first
-            test_guest_id = self.create_test_guest("RateLimit", "Test", "99999999999")
-            if test_guest_id:
-                rate_session = requests.Session()
-                rate_session.headers.update({
-                    "Authorization": f"Bearer {self.token}",
-                    "Content-Type": "application/json"
-                })
-                
-                rate_hit = False
-                for i in range(65):  # Try 65 requests
-                    response = rate_session.patch(
-                        f"{self.base_url}/api/guests/{test_guest_id}",
-                        json={"notes": f"Update {i}"},
-                        timeout=5
-                    )
-                    
-                    if response.status_code == 429:
-                        print(f"    ✅ Rate limit hit on guest update at request {i+1}")
-                        rate_hit = True
-                        break
-                    elif i % 20 == 0:
-                        print(f"    Update request {i+1}: {response.status_code}")
-                        
-                    time.sleep(0.01)
-                
-                if rate_hit:
-                    results.append(("Guest update rate limiting", True, "Rate limit working"))
-                else:
-                    results.append(("Guest update rate limiting", False, "Rate limit not triggered after 65 requests"))
-            else:
-                results.append(("Guest update rate limiting", False, "Failed to create test guest"))
-                
-        except Exception as e:
-            results.append(("Guest update rate limiting", False, f"Test error: {str(e)}"))
+        print(f"    Created {len(test_guests)} test guests for delete rate limit test")
+        return asyncio.run(self._rate_limiting_expansion(test_guest_id, test_guests))
 
-        # Test 3: DELETE /api/guests/{id} (should have 30/minute limit)
-        print("\n  Test 3: Rate limiting on guest delete endpoint...")
+    async def _rate_limiting_expansion(self, test_guest_id: Optional[str], test_guests: List[str]) -> list:
+        """Probe all three endpoints in one interleaved burst over a pooled aiohttp session"""
+        results = []
+        
+        # Precompute probe targets so the bursts only do network work
+        probe_count = sum(PROBE_BATCHES)
+        guests_url = f"{self.base_url}/api/guests"
+        check_dup_urls = [f"{guests_url}/check-duplicate?id_number=test{i}" for i in range(probe_count)]
+        update_payloads = [{"notes": f"Update {i}"} for i in range(probe_count)]
+        update_urls = [f"{guests_url}/{test_guest_id}"] * probe_count
+        delete_urls = [f"{guests_url}/{guest_id}" for guest_id in test_guests]
+        
+        # (result name, endpoint label, success message, probe) - all probes share one burst window
+        session = self._burst_session()
+        probes = [
+            ("Check-duplicate rate limiting", "check-duplicate", "Rate limit working",
+             self._probe(session, "GET", check_dup_urls)),
+            ("Guest update rate limiting", "guest update", "Rate limit working",
+             self._probe(session, "PATCH", update_urls, update_payloads) if test_guest_id else None),
+            ("Guest delete rate limiting", "guest delete", "Rate limit working (30/minute)",
+             self._probe(session, "DELETE", delete_urls)),
+        ]
+        
+        print("\n  Probing check-duplicate, guest update and guest delete endpoints...")
         try:
-            rate_session = requests.Session()
-            rate_session.headers.update({
-                "Authorization": f"Bearer {self.token}",
-                "Content-Type": "application/json"
-            })
-            
-            rate_hit = False
-            # Create multiple test guests for deletion
-            test_guests = []
-            for i in range(35):
-                guest_id = self.create_test_guest("DelTest", f"User{i}", f"88800{i:05d}")
-                if guest_id:
-                    test_guests.append(guest_id)
-                if len(test_guests) >= 32:  # Enough for testing
-                    break
-            
-            print(f"    Created {len(test_guests)} test guests for delete rate limit test")
-            
-            for i, guest_id in enumerate(test_guests):
-                response = rate_session.delete(
-                    f"{self.base_url}/api/guests/{guest_id}",
-                    timeout=5
-                )
-                
-                if response.status_code == 429:
-                    print(f"    ✅ Rate limit hit on guest delete at request {i+1}")
-                    rate_hit = True
-                    break
-                elif i % 10 == 0:
-                    print(f"    Delete request {i+1}: {response.status_code}")
-                    
-                time.sleep(0.01)
-            
+            outcomes = iter(await asyncio.gather(
+                *[probe for *_, probe in probes if probe is not None],
+                return_exceptions=True
+            ))
+        finally:
+            await session.close()
+        
+        for name, label, message, probe in probes:
+            if probe is None:
+                results.append((name, False, "Failed to create test guest"))
+                continue
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                results.append((name, False, f"Test error: {str(outcome)}"))
+                continue
+            rate_hit, sent = outcome
             if rate_hit:
-                results.append(("Guest delete rate limiting", True, "Rate limit working (30/minute)"))
+                print(f"    ✅ Rate limit hit on {label} within {sent} requests")
+                results.append((name, True, message))
             else:
-                results.append(("Guest delete rate limiting", False, f"Rate limit not triggered after {len(test_guests)} requests"))
-                
-        except Exception as e:
-            results.append(("Guest delete rate limiting", False, f"Test error: {str(e)}"))
+                results.append((name, False, f"Rate limit not triggered after {sent} requests"))
 
         return results
 
@@ -419,32 +411,36 @@ class P1BackendTester:
         except Exception as e:
             return (False, f"Background scheduler test error: {str(e)}")
 
-    def cleanup_test_guests(self):
-        """Clean up any test guests created during testing"""
-        print("\n🧹 Cleaning up test guests...")
-        
-        for guest_id in self.test_guest_ids:
-            try:
-                # Try permanent delete first (if admin)
+    def _cleanup_test_guest(self, guest_id: str):
+        """Delete one test guest, falling back to soft delete"""
+        try:
+            # Try permanent delete first (if admin)
+            response = self.session.delete(
+                f"{self.base_url}/api/guests/{guest_id}?permanent=true",
+                timeout=10
+            )
+            if response.status_code == 200:
+                print(f"    ✅ Permanently deleted test guest: {guest_id}")
+            else:
+                # Try soft delete if permanent fails
                 response = self.session.delete(
-                    f"{self.base_url}/api/guests/{guest_id}?permanent=true",
+                    f"{self.base_url}/api/guests/{guest_id}",
                     timeout=10
                 )
                 if response.status_code == 200:
-                    print(f"    ✅ Permanently deleted test guest: {guest_id}")
+                    print(f"    ✅ Soft deleted test guest: {guest_id}")
                 else:
-                    # Try soft delete if permanent fails
-                    response = self.session.delete(
-                        f"{self.base_url}/api/guests/{guest_id}",
-                        timeout=10
-                    )
-                    if response.status_code == 200:
-                        print(f"    ✅ Soft deleted test guest: {guest_id}")
-                    else:
-                        print(f"    ⚠️  Failed to delete test guest: {guest_id}")
-                        
-            except Exception as e:
-                print(f"    ⚠️  Error deleting test guest {guest_id}: {str(e)}")
+                    print(f"    ⚠️  Failed to delete test guest: {guest_id}")
+                    
+        except Exception as e:
+            print(f"    ⚠️  Error deleting test guest {guest_id}: {str(e)}")
+
+    def cleanup_test_guests(self):
+        """Clean up any test guests created during testing"""
+        print("\n🧹 Cleaning up test guests...")
+        
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(self._cleanup_test_guest, self.test_guest_ids))
 
     def run_p1_tests(self) -> bool:
         """Run all P1 backend tests"""
@@ -5,17 +5,34 @@ This test covers all the new v4.0 endpoints with proper error handling and repor
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 BASE_URL = "https://improve-guide.preview.emergentagent.com/api"
 ADMIN_EMAIL = "admin@quickid.com"
 ADMIN_PASSWORD = "admin123"
 
+# 1x1 PNG shared by photo upload and quality check
+TEST_IMAGE_BASE64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChAI9jU77zgAAAABJRU5ErkJggg=="
+
+# Lower-cased so the check is independent of the server's header casing
+REQUIRED_SECURITY_HEADERS = frozenset({"x-content-type-options", "x-frame-options"})
+
+# Drops the session's Authorization header for public endpoints (None removes it on merge)
+PUBLIC_HEADERS = {"Authorization": None}
+
 class FinalTester:
     def __init__(self):
+        # Single keep-alive pool for every call (authenticated or public)
         self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
         self.token = None
+        # Unique suffix for test data, formatted once per run
+        self.run_id = datetime.now().strftime('%H%M%S')
+        # Guests to delete at the end of the run, even if a section raises
+        self.created_guest_ids = []
         self.test_results = {
             'working': [],
             'failing': [],
@@ -36,25 +53,17 @@ class FinalTester:
             return True
         return False
     
-    def test_endpoint(self, name, method, endpoint, data=None, auth_required=True):
-        """Test a single endpoint"""
+    def test_endpoint(self, name, method, endpoint, data=None, auth_required=True, parse_json=True):
+        """Test a single endpoint (parse_json=False returns the raw response)"""
         try:
-            if method == 'GET':
-                if auth_required:
-                    response = self.session.get(f"{BASE_URL}{endpoint}")
-                else:
-                    response = requests.get(f"{BASE_URL}{endpoint}")
-            elif method == 'POST':
-                if auth_required:
-                    response = self.session.post(f"{BASE_URL}{endpoint}", json=data)
-                else:
-                    response = requests.post(f"{BASE_URL}{endpoint}", json=data)
-            elif method == 'PATCH':
-                response = self.session.patch(f"{BASE_URL}{endpoint}", json=data)
+            headers = None if auth_required else PUBLIC_HEADERS
+            response = self.session.request(method, f"{BASE_URL}{endpoint}", json=data, headers=headers)
             
             if response.status_code == 200:
+                # Parse before recording: a non-JSON 200 falls through to the failure branch only
+                body = response.json() if parse_json else response
                 self.test_results['working'].append(f"✅ {name}")
-                return True, response.json()
+                return True, body
             else:
                 self.test_results['failing'].append(f"❌ {name} (Status: {response.status_code})")
                 return False, response.text
@@ -63,6 +72,12 @@ class FinalTester:
             self.test_results['failing'].append(f"❌ {name} (Exception: {str(e)})")
             return False, str(e)
     
+    def test_endpoints_parallel(self, calls):
+        """Test independent endpoints concurrently on the shared session"""
+        with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+            futures = [pool.submit(self.test_endpoint, *call) for call in calls]
+            return [future.result() for future in futures]
+    
     def run_comprehensive_tests(self):
         """Run all endpoint tests"""
         print("🚀 Final Comprehensive v4.0 Backend API Tests")
@@ -71,7 +86,16 @@ class FinalTester:
         if not self.authenticate():
             print("❌ Authentication failed")
             return
-            
+        
+        try:
+            self.run_endpoint_tests()
+        finally:
+            self.cleanup_test_data()
+        
+        self.print_final_results()
+    
+    def run_endpoint_tests(self):
+        """Run the endpoint test sections in dependency order"""
         # 1. Room Management Endpoints
         print("\n🏨 Room Management Tests:")
         
@@ -79,7 +103,7 @@ class FinalTester:
         self.test_endpoint("Room Types", "GET", "/rooms/types", auth_required=False)
         
         # Create room (use unique number)
-        room_number = f"TEST{datetime.now().strftime('%H%M%S')}"
+        room_number = f"TEST{self.run_id}"
         success, result = self.test_endpoint("Create Room", "POST", "/rooms", {
             "room_number": room_number,
             "room_type": "standard", 
@@ -91,8 +115,11 @@ class FinalTester:
         if success:
             room_id = result.get('room', {}).get('room_id')  # Use the UUID room_id
             
-        self.test_endpoint("List Rooms", "GET", "/rooms")
-        self.test_endpoint("Room Stats", "GET", "/rooms/stats")
+        # Both reads only depend on the room having been created
+        self.test_endpoints_parallel([
+            ("List Rooms", "GET", "/rooms"),
+            ("Room Stats", "GET", "/rooms/stats"),
+        ])
         
         # Test room update if we have a room
         if room_id:
@@ -105,7 +132,7 @@ class FinalTester:
         guest_success, guest_result = self.test_endpoint("Create Test Guest", "POST", "/guests", {
             "first_name": "TestPhoto",
             "last_name": "User",
-            "id_number": f"PHOTO{datetime.now().strftime('%H%M%S')}",
+            "id_number": f"PHOTO{self.run_id}",
             "nationality": "Germany",
             "document_type": "passport", 
             "kvkk_consent": True
@@ -114,11 +141,11 @@ class FinalTester:
         guest_id = None
         if guest_success:
             guest_id = guest_result.get('guest', {}).get('id')
+            self.created_guest_ids.append(guest_id)
             
             # Test photo upload/retrieve
-            base64_img = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChAI9jU77zgAAAABJRU5ErkJggg=="
             self.test_endpoint("Upload Guest Photo", "POST", f"/guests/{guest_id}/photo", {
-                "image_base64": base64_img
+                "image_base64": TEST_IMAGE_BASE64
             })
             self.test_endpoint("Retrieve Guest Photo", "GET", f"/guests/{guest_id}/photo")
             
@@ -134,12 +161,13 @@ class FinalTester:
             success, result = self.test_endpoint(f"Create Group Guest {i+1}", "POST", "/guests", {
                 "first_name": f"Group{i+1}",
                 "last_name": "Test",
-                "id_number": f"GRP{datetime.now().strftime('%H%M%S')}{i}",
+                "id_number": f"GRP{self.run_id}{i}",
                 "nationality": "Türkiye",
                 "kvkk_consent": True
             })
             if success:
                 guest_ids.append(result.get('guest', {}).get('id'))
+        self.created_guest_ids.extend(guest_ids)
         
         if len(guest_ids) >= 2:
             self.test_endpoint("Group Check-in", "POST", "/guests/group-checkin", {
@@ -170,10 +198,13 @@ class FinalTester:
         # 5. Monitoring Dashboard Tests
         print("\n📊 Monitoring Dashboard Tests:")
         
-        self.test_endpoint("Monitoring Dashboard", "GET", "/monitoring/dashboard")
-        self.test_endpoint("Scan Statistics", "GET", "/monitoring/scan-stats?days=30")
-        self.test_endpoint("Error Log", "GET", "/monitoring/error-log?days=7")  
-        self.test_endpoint("AI Costs", "GET", "/monitoring/ai-costs?days=30")
+        # Read-only and independent of each other - run concurrently
+        self.test_endpoints_parallel([
+            ("Monitoring Dashboard", "GET", "/monitoring/dashboard"),
+            ("Scan Statistics", "GET", "/monitoring/scan-stats?days=30"),
+            ("Error Log", "GET", "/monitoring/error-log?days=7"),
+            ("AI Costs", "GET", "/monitoring/ai-costs?days=30"),
+        ])
         
         # 6. Backup/Restore Tests
         print("\n💾 Backup/Restore Tests:")
@@ -181,15 +212,17 @@ class FinalTester:
         self.test_endpoint("Create Backup", "POST", "/admin/backup", {
             "description": "Final test backup"
         })
-        self.test_endpoint("List Backups", "GET", "/admin/backups")
-        self.test_endpoint("Backup Schedule", "GET", "/admin/backup-schedule")
+        self.test_endpoints_parallel([
+            ("List Backups", "GET", "/admin/backups"),
+            ("Backup Schedule", "GET", "/admin/backup-schedule"),
+        ])
         
         # 7. OCR/Quality Check Tests
         print("\n🔍 OCR/Quality Tests:")
         
         self.test_endpoint("OCR Status", "GET", "/scan/ocr-status", auth_required=False)
         self.test_endpoint("Image Quality Check", "POST", "/scan/quality-check", {
-            "image_base64": base64_img
+            "image_base64": TEST_IMAGE_BASE64
         })
         
         # 8. Compliance Reports
@@ -200,22 +233,24 @@ class FinalTester:
         # 9. Security Headers Test
         print("\n🔒 Security Headers Test:")
         
-        response = self.session.get(f"{BASE_URL}/dashboard/stats")
-        if response.status_code == 200:
-            headers = response.headers
-            if 'X-Content-Type-Options' in headers and 'X-Frame-Options' in headers:
+        success, response = self.test_endpoint("Dashboard Stats", "GET", "/dashboard/stats", parse_json=False)
+        if success:
+            missing = REQUIRED_SECURITY_HEADERS.difference(h.lower() for h in response.headers)
+            if not missing:
                 self.test_results['working'].append("✅ Security Headers")
             else:
-                self.test_results['failing'].append("❌ Security Headers Missing")
+                self.test_results['failing'].append(f"❌ Security Headers Missing ({', '.join(sorted(missing))})")
+    
+    def cleanup_test_data(self):
+        """Delete the guests created during the run"""
+        created_guest_ids = [gid for gid in self.created_guest_ids if gid]
+        if not created_guest_ids:
+            return
         
-        # Cleanup created test data
         print("\n🧹 Cleaning up test data...")
-        if guest_id:
-            requests.delete(f"{BASE_URL}/guests/{guest_id}", headers={"Authorization": f"Bearer {self.token}"})
-        for gid in guest_ids:
-            requests.delete(f"{BASE_URL}/guests/{gid}", headers={"Authorization": f"Bearer {self.token}"})
-        
-        self.print_final_results()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda gid: self.session.delete(f"{BASE_URL}/guests/{gid}"), created_guest_ids))
+        self.created_guest_ids.clear()
     
     def print_final_results(self):
         """Print comprehensive test results"""